@@ -17,17 +17,21 @@ Main Components:
 The module is designed to work without a graphical frontend (via `mpl.use('Agg')`), generating files directly.
 """
 import colorcet as cc
+import fastcluster
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
 from matplotlib.colors import ListedColormap
+from joblib import Memory
 from scipy.cluster import hierarchy
-from scipy.spatial import distance
 
 mpl.use('Agg')  # use without front-end interactive windows, only create files
 
+# Disk cache so reruns of the plotting pipeline reuse the linkage matrices
+memory = Memory("/data/.cache", verbose=0)
+
 
 def load_and_preprocess_data(filepath):
     """
@@ -63,11 +67,16 @@ def log_normalize(data, factor=10):
     return np.log1p(data / factor)
 
 
+@memory.cache
 def calculate_linkage(data, method='complete', metric='euclidean', axis=0):
     """
     Calculate hierarchical linkage for clustering using the specified method and metric.
-    
+
     The linkage is calculated on either rows or columns of the data based on the axis parameter.
+    The observation matrix is passed to fastcluster directly: for 'single', 'ward', 'centroid'
+    and 'median' with euclidean distances this takes the memory-frugal linkage_vector path
+    that never materializes the full condensed distance matrix; the other methods compute
+    the condensed matrix internally, still without an extra copy on our side.
 
     Args:
         data (pd.DataFrame): Input data for clustering.
@@ -80,10 +89,13 @@ def calculate_linkage(data, method='complete', metric='euclidean', axis=0):
     """
     if axis == 1:
         data = data.T # Transpose if clustering on rows
-    # Compute pairwise distances between data points
-    distances = distance.pdist(data)
-    # Generate linkage matrix based on method and metric
-    return hierarchy.linkage(distances, method=method, metric=metric)
+    observations = np.ascontiguousarray(data.values, dtype=np.float64)
+    if method in ("single", "ward", "centroid", "median") and metric == "euclidean":
+        # Memory-frugal path, O(N) memory instead of the O(N^2) condensed matrix
+        return fastcluster.linkage_vector(observations, method=method)
+    # Generate linkage matrix based on method and metric; fastcluster produces
+    # the same linkage as scipy but runs the agglomeration 2-5x faster
+    return fastcluster.linkage(observations, method=method, metric=metric)
 
 
 def extract_clusters(linkage, max_clusters=15):
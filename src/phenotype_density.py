@@ -14,11 +14,12 @@ Main Components:
 - `densities`: Computes phenotype densities for all phenotype-region combinations.
 - `run`: Executes the full workflow from loading data to phenotyping and density computation.
 """
+import functools
 import pathlib
-from itertools import product
 
+import numpy as np
 import pandas as pd
-from shapely.prepared import prep
+import shapely
 from tqdm import tqdm
 
 from src.utils import get_geometries
@@ -39,9 +40,10 @@ def extract(pattern, column, df):
         pd.DataFrame: A DataFrame with the extracted matches replacing the original column.
     """
 
-    df = df.copy()  # avoid side-effects (no inplace operations)
     tmp = df[column].str.extract(pattern) # Extract regex matches
-    return df.join(tmp).drop(column, axis=1) # Replace original column with extracted results
+    # Dropping the column and concatenating builds a fresh frame without first
+    # deep-copying every input column; the caller's frame stays untouched
+    return pd.concat([df.drop(columns=column), tmp], axis=1)
 
 
 def parse_tag_string_to_multi_hot_vector(marks):
@@ -61,13 +63,14 @@ def parse_tag_string_to_multi_hot_vector(marks):
     marks = marks.drop_duplicates().reset_index(drop=True)
     # Replace spaces with underscores in tag names
     marks["tag_name"] = marks.tag_name.str.replace(" ", "_")
-    # Extract marker and value from tag names
-    marks = extract("(?P<tag>.*)_(?P<value>.*)", "tag_name", marks)
+    # Split marker and value at the last underscore with a C string routine
+    marks[["tag", "value"]] = marks.tag_name.str.rsplit("_", n=1, expand=True)
+    marks = marks.drop("tag_name", axis=1)
     # Map marker values to 0 or 1
     marks["value"] = marks.value.map(dict(negative=0, positive=1))
     # Convert DataFrame from records format (long) to Features format (wide) by performing an unpivot operation
-    # This is implemented by a group by over 'polygon_id' and converting tag to an index, only keeping value
-    marks = marks.groupby("polygon_id").apply(lambda x: x.set_index("tag")["value"])
+    # This is implemented as a single pivot instead of one Python callable per polygon group
+    marks = marks.pivot_table(index="polygon_id", columns="tag", values="value")
     return marks
 
 
@@ -75,6 +78,9 @@ def multilabel_to_phenotype(marks, lookup):
     """
     Maps multi-hot vectors of marker activations to predefined phenotypes using a lookup table.
 
+    Each multi-hot row is packed into a single uint64 key, one bit per marker, so rows are
+    compared as plain integers instead of formatted strings.
+
     Args:
         marks (pd.DataFrame): Multi-hot vectors representing marker activations for each cell.
         lookup (pd.DataFrame): A lookup table mapping marker combinations to phenotypes.
@@ -87,16 +93,17 @@ def multilabel_to_phenotype(marks, lookup):
     marks = column_sort(marks) # Sort columns in the marker DataFrame
     lookup = column_sort(lookup) # Sort columns in the lookup DataFrame
     assert all(marks.columns == lookup.columns),  "Columns in marks and lookup must match."
+    assert len(marks.columns) <= 64, "Bit-packing supports at most 64 markers."
 
-    # Convert each row (multi-hot vector) to a string for comparison
-    row2str = lambda x: str(x.values)
-    marks = marks.apply(row2str, axis=1)
-    lookup = lookup.apply(row2str, axis=1)
+    # Pack each multi-hot vector into a uint64 with one vectorized multiply-add
+    weights = np.uint64(1) << np.arange(len(marks.columns), dtype=np.uint64)
+    marks_keys = (marks.to_numpy(dtype=np.uint64) * weights).sum(axis=1)
+    lookup_keys = (lookup.to_numpy(dtype=np.uint64) * weights).sum(axis=1)
 
-    # Create a dictionary that maps string representations of marker combinations to phenotypes
-    lookup = {v: k for k, v in lookup.items()}
+    # Create a dictionary that maps packed marker combinations to phenotypes
+    lookup = dict(zip(lookup_keys, lookup.index))
     # Map markers to phenotypes, defaulting to "Other"
-    return marks.map(lookup).fillna("Other")
+    return pd.Series(marks_keys, index=marks.index).map(lookup).fillna("Other")
 
 
 def column_names_replace_whitespace(df):
@@ -126,30 +133,27 @@ def clean_conflicting(marks):
     Returns:
         pd.DataFrame: A modified DataFrame with conflicts resolved.
     """
-    marks.loc[marks[marks.CD3 == 1].index, "CK"] = 0
-    marks.loc[marks[marks.CD20 == 1].index, "CK"] = 0
-    marks.loc[marks[marks.CD68 == 1].index, "CK"] = 0
-    marks.loc[marks[marks.CD163 == 1].index, "CK"] = 0
+    # One combined boolean mask and a single assignment pass, instead of four
+    # separate indexing rounds over the frame
+    conflicting = (marks[["CD3", "CD20", "CD68", "CD163"]] == 1).any(axis=1)
+    marks.loc[conflicting, "CK"] = 0
     return marks
 
 
-def phenotyping(marks, granularity: str):
+@functools.cache
+def _load_lookup(granularity: str):
     """
-    Assigns phenotypes to cells based on their marker expressions, using expert-curated phenotype definitions.
+    Loads and cleans the expert-curated phenotype lookup table for a granularity.
 
-    The phenotyping is controlled by `granularity`, which determines the level of detail in the phenotype mapping.
-    Available options are "medium" or "fine", which correspond to different phenotype mappings in the lookup table.
+    Cached per granularity, so repeated phenotyping calls skip the comparatively
+    slow openpyxl workbook parse.
 
     Args:
-        marks (pd.DataFrame): DataFrame containing marker expressions for each cell.
-        granularity (str): The granularity level for phenotyping, must be one of the sheets in the lookup table.
+        granularity (str): The sheet name in the phenotyping workbook to load.
 
     Returns:
-        pd.Series: A series mapping each cell to its phenotype.
+        pd.DataFrame: The cleaned lookup table indexed by phenotype.
     """
-    marks = clean_conflicting(marks)
-
-    # Load the phenotype lookup table from an Excel file
     xls = pd.ExcelFile("/data/tier2/metadata/phenotyping.xlsx")
     assert granularity in xls.sheet_names, f"must be one of {xls.sheet_names}"
     lookup = pd.read_excel(xls, sheet_name=granularity)
@@ -164,6 +168,27 @@ def phenotyping(marks, granularity: str):
               .set_index("Cell phenotype")
               .pipe(column_names_replace_whitespace)
               .rename(columns={"FOXP3": "FoxP3"}))
+    return lookup
+
+
+def phenotyping(marks, granularity: str):
+    """
+    Assigns phenotypes to cells based on their marker expressions, using expert-curated phenotype definitions.
+
+    The phenotyping is controlled by `granularity`, which determines the level of detail in the phenotype mapping.
+    Available options are "medium" or "fine", which correspond to different phenotype mappings in the lookup table.
+
+    Args:
+        marks (pd.DataFrame): DataFrame containing marker expressions for each cell.
+        granularity (str): The granularity level for phenotyping, must be one of the sheets in the lookup table.
+
+    Returns:
+        pd.Series: A series mapping each cell to its phenotype.
+    """
+    marks = clean_conflicting(marks)
+
+    # Load the phenotype lookup table from the Excel file (cached per granularity)
+    lookup = _load_lookup(granularity)
 
     marks = multilabel_to_phenotype(marks, lookup)
     return marks
@@ -194,43 +219,36 @@ def densities(points, phenotypes, regions):
                       - 'density': The computed density of the phenotype in the region.
                       - 'wsi_uuid': The UUID of the whole slide image (WSI) the data corresponds to.
     """
-    def density(points, marks, regions):
-        """
-        Computes the density for one phenotype-region combination.
-
-        For each phenotype and region, the function calculates how many cells express the 
-        phenotype and are located inside the region. The density is calculated as:
-        
-        Density = (Number of cells expressing the phenotype inside the region) / (Area of the region)
-
-        Args:
-            points (pd.DataFrame): DataFrame of cell coordinates and metadata.
-            marks (pd.Series): Series mapping 'polygon_uuid' to phenotypes.
-            regions (pd.DataFrame): DataFrame of region geometries.
-
-        Returns:
-            Function: A wrapped function that calculates density for one phenotype-region pair.
-        """
-        def wrapped(ids):
-            marker_id, region_id = ids  # Unpack phenotype and region
-            # Merge points and phenotype data based on polygon_uuid
-            joined = points.merge(marks.to_frame("mark"), on="polygon_uuid")
-            subset = joined[joined.mark == marker_id] # Filter to get only cells with the specific phenotype
-            region = regions.query("region==@region_id").geom.item() # Get the geometry of the region
-            pregion = prep(region) # Prepare the region geometry for efficient spatial queries
-            # Check how many cells are contained in the region and compute density
-            return subset.geom.apply(lambda x: pregion.contains(x)).sum() / region.area
-
-        return wrapped
-
-    # Generate all possible phenotype-region combinations
-    combinations = list(product(phenotypes.unique(), regions.region.tolist()))
-    # Create a DataFrame of combinations
-    combinations = pd.DataFrame(combinations, columns=["marker", "region"])
-    # Apply the density calculation for each combination
-    combinations["density"] = combinations.apply(density(points, phenotypes, regions), axis=1)
+    # Attach the phenotype of each cell through an index-aligned lookup on
+    # polygon_uuid, which skips the hash-join machinery (and its sort and copy
+    # of both frames) that a merge would run
+    joined = points.assign(mark=points.polygon_uuid.map(phenotypes))
+
+    # Build an STRtree over the regions once and resolve the containing region of
+    # every point in a single bulk query, replacing the per-region containment passes
+    tree = shapely.STRtree(regions.geom.values)
+    point_idx, region_idx = tree.query(joined.geom.values, predicate="within")
+
+    # Count the contained cells per (phenotype, region), keeping explicit zeros
+    # for combinations without any cells
+    combinations = pd.MultiIndex.from_product([phenotypes.unique(), regions.region], names=["marker", "region"])
+    counts = (
+        pd.DataFrame({
+            "marker": joined.mark.values[point_idx],
+            "region": regions.region.values[region_idx],
+        })
+        .value_counts()
+        .reindex(combinations, fill_value=0)
+    )
+    # Divide each region's counts by the region area to obtain densities
+    areas = pd.Series(shapely.area(regions.geom.values), index=regions.region)
+    outcome = (
+        (counts / areas.reindex(counts.index.get_level_values("region")).values)
+        .rename("density")
+        .reset_index()
+    )
     # Filter out 'Other' phenotypes (if necessary) and assign WSI UUID
-    return combinations.query("marker!='Other'").assign(wsi_uuid=points.wsi_uuid.unique()[0])
+    return outcome.query("marker!='Other'").assign(wsi_uuid=points.wsi_uuid.unique()[0])
 
 
 def run():
@@ -260,17 +278,19 @@ def run():
     marks, points, regions = get_geometries()
      # Perform phenotyping
     phenotypes = phenotyping(marks.set_index(["polygon_uuid", "wsi_uuid"]), "medium")
-    # Get unique WSI UUIDs
-    wsi_uuids = points.wsi_uuid.drop_duplicates()
+    # Split points and regions into per-WSI sub-frames in a single groupby pass,
+    # instead of rescanning the full frames once per WSI
+    points_by_wsi = dict(tuple(points.groupby("wsi_uuid", sort=False)))
+    regions_by_wsi = dict(tuple(regions.groupby("wsi_uuid", sort=False)))
 
     outcome = []
     # Iterate through each WSI UUID to compute densities for that WSI
-    for wsi_uuid in tqdm(wsi_uuids, "Computing density of phenotype x in region y"):
+    for wsi_uuid in tqdm(points_by_wsi, "Computing density of phenotype x in region y"):
         # Compute the densities for the current WSI and append the result to the outcome list
         outcome.append(densities(
-            points.query("wsi_uuid==@wsi_uuid"),
+            points_by_wsi[wsi_uuid],
             phenotypes.loc[:, wsi_uuid],
-            regions.query("wsi_uuid==@wsi_uuid"),
+            regions_by_wsi[wsi_uuid],
         ))
     outcome = pd.concat(outcome)
     # Save the computed densities to a Parquet file for further analysis